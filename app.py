@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # app.py — Simple Twitch Monitor (FastAPI + EventSubWS) — single-file version
-# Run:
-#   pip install fastapi uvicorn httpx twitchAPI python-multipart
+# Run (Python 3.11+):
+#   pip install fastapi 'uvicorn[standard]' 'httpx[http2]' twitchAPI python-multipart orjson msgspec cachetools aiosqlite
 #   python app.py
 #
 # Endpoints:
@@ -11,16 +11,23 @@
 #   /ws       - realtime updates
 
 import asyncio
-import json
+import gzip
+import hashlib
+import hmac
+import threading
 import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Optional, Set
 
+import aiosqlite
 import httpx
+import msgspec
+import orjson
+from cachetools import LRUCache
 import uvicorn
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect, Depends, Form, HTTPException, status
-from fastapi.responses import HTMLResponse, RedirectResponse, PlainTextResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, RedirectResponse, PlainTextResponse, Response
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 
 # TwitchAPI
@@ -28,7 +35,25 @@ from twitchAPI.twitch import Twitch
 from twitchAPI.eventsub.websocket import EventSubWebsocket
 
 # ---------------- Storage ----------------
+# Config lives in store.json; streamers live in SQLite so an EventSub event
+# commits one row instead of rewriting the whole file. store["streamers"] is
+# an in-memory cache of that table, rebuilt by open_db() on startup.
 STORE_PATH = Path("store.json")
+DB_PATH = Path("store.db")
+
+class Streamer(msgspec.Struct):
+    """One tracked channel; field order matches the streamers table columns."""
+    login: str
+    user_id: str
+    display_name: str
+    is_live: bool = False
+    last_live: str = ""
+    started_at: str = ""
+    title: str = ""
+    game_id: str = ""
+    game_name: str = ""
+
+STREAMERS_JSON = msgspec.json.Encoder()  # encodes Dict[str, Streamer]
 
 DEFAULT_STORE = {
     "admin": {"username": "admin", "password": "changeme"},
@@ -39,38 +64,98 @@ DEFAULT_STORE = {
         "expires_in": 0
     },
     "discord": {"webhook": ""},
-    "streamers": {
-        # "login": { user_id, display_name, is_live, last_live, started_at, title, game_id, game_name }
-    }
 }
 
 def load_store() -> Dict[str, Any]:
     if STORE_PATH.exists():
         try:
-            return json.loads(STORE_PATH.read_text())
+            return orjson.loads(STORE_PATH.read_bytes())
         except Exception:
             pass
-    STORE_PATH.write_text(json.dumps(DEFAULT_STORE, indent=2))
-    return json.loads(STORE_PATH.read_text())
+    STORE_PATH.write_bytes(orjson.dumps(DEFAULT_STORE, option=orjson.OPT_INDENT_2))
+    return orjson.loads(STORE_PATH.read_bytes())
+
+STORE_LOCK = threading.Lock()  # serializes writers to the shared .tmp file
 
-def save_store(s: Dict[str, Any]):
-    tmp = STORE_PATH.with_suffix(".tmp")
-    tmp.write_text(json.dumps(s, indent=2))
-    tmp.replace(STORE_PATH)
+def _save_store_sync(s: Dict[str, Any]):
+    config = {k: v for k, v in s.items() if k != "streamers"}
+    with STORE_LOCK:
+        tmp = STORE_PATH.with_suffix(".tmp")
+        tmp.write_bytes(orjson.dumps(config, option=orjson.OPT_INDENT_2))
+        tmp.replace(STORE_PATH)
+
+async def save_store(s: Dict[str, Any]):
+    """Write the config on the default thread pool so slow disks don't block the loop."""
+    await asyncio.to_thread(_save_store_sync, s)
 
 store = load_store()
 
+DB: Optional[aiosqlite.Connection] = None
+
+async def open_db():
+    """Open the streamers DB, migrate streamers from store.json, load the cache."""
+    global DB
+    DB = await aiosqlite.connect(DB_PATH)
+    DB.row_factory = aiosqlite.Row
+    await DB.execute("PRAGMA journal_mode=WAL")
+    await DB.execute("PRAGMA synchronous=NORMAL")
+    await DB.execute(
+        "CREATE TABLE IF NOT EXISTS streamers("
+        "login TEXT PRIMARY KEY, user_id TEXT, display_name TEXT, is_live INT, last_live TEXT,"
+        " started_at TEXT, title TEXT, game_id TEXT, game_name TEXT)"
+    )
+    # One-time migration from versions that kept streamers in store.json
+    legacy = store.get("streamers") or {}
+    for login, s in legacy.items():
+        await DB.execute(
+            "INSERT OR IGNORE INTO streamers VALUES (?,?,?,?,?,?,?,?,?)",
+            (login, *(s.get(k) for k in Streamer.__struct_fields__[1:])),
+        )
+    await DB.commit()
+
+    async with DB.execute("SELECT * FROM streamers") as cur:
+        rows = await cur.fetchall()
+    streamers: Dict[str, Streamer] = {}
+    for row in rows:
+        s = Streamer(**{k: row[k] or "" for k in Streamer.__struct_fields__})
+        s.is_live = bool(row["is_live"])
+        streamers[s.login] = s
+    store["streamers"] = streamers
+    USER_ID_TO_LOGIN.clear()
+    USER_ID_TO_LOGIN.update({s.user_id: login for login, s in streamers.items() if s.user_id})
+    if legacy:
+        await save_store(store)  # drop the migrated streamers from store.json
+
+async def db_update_streamer(login: str, fields: Dict[str, Any]):
+    """Persist changed fields of one streamer; keys are Streamer field names."""
+    if not fields:
+        return
+    cols = ", ".join(f"{k}=?" for k in fields)
+    await DB.execute(f"UPDATE streamers SET {cols} WHERE login=?", (*fields.values(), login))
+    await DB.commit()
+
+async def db_upsert_streamer(s: Streamer):
+    await DB.execute("INSERT OR REPLACE INTO streamers VALUES (?,?,?,?,?,?,?,?,?)", msgspec.structs.astuple(s))
+    await DB.commit()
+
+async def db_delete_streamer(login: str):
+    await DB.execute("DELETE FROM streamers WHERE login=?", (login,))
+    await DB.commit()
+
 # ---------------- App & Auth ----------------
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 security = HTTPBasic()
 
-def check_auth(credentials: HTTPBasicCredentials = Depends(security)):
+async def check_auth(credentials: HTTPBasicCredentials = Depends(security)):
     username = store["admin"]["username"]
     password = store["admin"]["password"]
-    if credentials.username == username and credentials.password == password:
+    # Compare both fields in constant time so neither leaks via timing
+    ok = hmac.compare_digest(credentials.username.encode(), username.encode())
+    ok &= hmac.compare_digest(credentials.password.encode(), password.encode())
+    if ok:
         return True
-    # Small delay to slow brute force
-    time.sleep(0.3)
+    # Small delay to slow brute force (non-blocking, other requests keep flowing)
+    await asyncio.sleep(0.3)
     raise HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid credentials",
@@ -80,16 +165,24 @@ def check_auth(credentials: HTTPBasicCredentials = Depends(security)):
 # ---------------- Twitch / EventSub State ----------------
 twitch: Optional[Twitch] = None
 es: Optional[EventSubWebsocket] = None
-GAME_CACHE: Dict[str, str] = {}       # game_id -> game_name
-WS_CLIENTS: List[WebSocket] = []      # connected browsers
+GAME_CACHE: LRUCache = LRUCache(maxsize=1024)  # game_id -> game_name
+GAME_INFLIGHT: Dict[str, asyncio.Future] = {}  # game_id -> pending lookup (single-flight)
+WS_CLIENTS: Set[WebSocket] = set()    # connected browsers
+LAST_SNAPSHOT: bytes = b""            # streamers JSON of the last full_update broadcast
+STATE_VERSION = 0                     # bumped on every streamer mutation and every broadcast
+BOOT_ID = f"{time.time_ns():x}"       # keeps ETags unique across restarts (STATE_VERSION resets)
+USER_ID_TO_LOGIN: Dict[str, str] = {}  # broadcaster user_id -> login (filled by open_db)
 
 def now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 def iso_to_hhmm(iso_str: str) -> str:
     try:
-        dt = datetime.fromisoformat(iso_str.replace("Z","+00:00"))
-        return dt.strftime("%Y-%m-%d %H:%M UTC")
+        dt = datetime.fromisoformat(iso_str)  # parses Twitch's trailing "Z" on 3.11+
+        if dt.tzinfo is not None:
+            # Normalize aware times to UTC; naive ones are printed as-is
+            dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+        return dt.isoformat(" ", "minutes") + " UTC"
     except Exception:
         return iso_str or ""
 
@@ -118,101 +211,187 @@ async def resolve_login_to_user(login: str) -> Optional[Dict[str, str]]:
 async def game_name_for(game_id: Optional[str]) -> Optional[str]:
     if not game_id:
         return None
-    if game_id in GAME_CACHE:
-        return GAME_CACHE[game_id]
-    client = await ensure_twitch_client()
-    if client is None:
-        return None
-    res = await client.get_games(game_ids=[game_id])
-    data = res.get("data", [])
-    if data:
-        name = data[0]["name"]
-        GAME_CACHE[game_id] = name
+    name = GAME_CACHE.get(game_id)
+    if name is not None:
         return name
-    return None
+    # Concurrent lookups of the same id share the first caller's request
+    fut = GAME_INFLIGHT.get(game_id)
+    if fut is not None:
+        try:
+            # shield: a cancelled waiter must not cancel the shared lookup
+            return await asyncio.shield(fut)
+        except asyncio.CancelledError:
+            if not fut.cancelled():
+                raise  # this waiter itself was cancelled
+            return await game_name_for(game_id)  # the leader was cancelled; retry
+    fut = asyncio.get_running_loop().create_future()
+    GAME_INFLIGHT[game_id] = fut
+    try:
+        name = None
+        client = await ensure_twitch_client()
+        if client is not None:
+            res = await client.get_games(game_ids=[game_id])
+            data = res.get("data", [])
+            if data:
+                name = data[0]["name"]
+                GAME_CACHE[game_id] = name
+    except asyncio.CancelledError:
+        GAME_INFLIGHT.pop(game_id, None)
+        fut.cancel()
+        raise
+    except Exception as exc:
+        # Waiters see the same error rather than a blank name
+        GAME_INFLIGHT.pop(game_id, None)
+        if not fut.done():
+            fut.set_exception(exc)
+            fut.exception()  # mark retrieved so unawaited failures aren't logged
+        raise
+    GAME_INFLIGHT.pop(game_id, None)
+    if not fut.done():
+        fut.set_result(name)
+    return name
+
+def streamers_snapshot() -> bytes:
+    """Streamers as a login-sorted [[login, streamer], ...] array, so browsers skip sorting."""
+    return STREAMERS_JSON.encode(sorted(store["streamers"].items()))
+
+def full_update_frame(snapshot: Optional[bytes] = None) -> bytes:
+    if snapshot is None:
+        snapshot = streamers_snapshot()
+    return b'{"type":"full_update","version":%d,"streamers":%s}' % (STATE_VERSION, snapshot)
+
+async def broadcast(frame: bytes):
+    """Send one pre-serialized frame to every connected client, pruning dead ones."""
+    clients = tuple(WS_CLIENTS)
+    results = await asyncio.gather(*(ws.send_bytes(frame) for ws in clients), return_exceptions=True)
+    for ws, res in zip(clients, results):
+        if isinstance(res, Exception):
+            WS_CLIENTS.discard(ws)
 
 async def push_update_to_clients():
-    """Broadcast full state to all connected web clients."""
-    payload = {"type": "full_update", "streamers": store["streamers"]}
-    dead = []
-    for ws in WS_CLIENTS:
-        try:
-            await ws.send_text(json.dumps(payload))
-        except Exception:
-            dead.append(ws)
-    for d in dead:
-        try:
-            WS_CLIENTS.remove(d)
-        except ValueError:
-            pass
+    """Broadcast full state to all connected web clients.
+
+    A snapshot identical to the previous broadcast is dropped since browsers
+    already have it.
+    """
+    global STATE_VERSION, LAST_SNAPSHOT
+    snapshot = streamers_snapshot()
+    if snapshot == LAST_SNAPSHOT:
+        return
+    LAST_SNAPSHOT = snapshot
+    STATE_VERSION += 1
+    await broadcast(full_update_frame(snapshot))
+
+def mark_state_changed():
+    """Bump STATE_VERSION right where streamers change, so /api/status ETags
+    never lag behind the data even if the later broadcast is skipped."""
+    global STATE_VERSION
+    STATE_VERSION += 1
+
+async def push_patch(login: str, fields: Dict[str, Any]):
+    """Broadcast only the fields of one streamer that changed."""
+    global STATE_VERSION, LAST_SNAPSHOT
+    LAST_SNAPSHOT = b""  # clients no longer match the last full snapshot
+    STATE_VERSION += 1
+    await broadcast(orjson.dumps({"type": "patch", "version": STATE_VERSION, "login": login, "fields": fields}))
 
 # ---------------- Discord ----------------
-async def discord_notify_online(login: str, s: Dict[str, Any]):
+HTTP: Optional[httpx.AsyncClient] = None  # shared, pooled client (opened on startup)
+
+async def post_webhook(webhook: str, content: str):
+    if HTTP is None:
+        return
+    try:
+        await HTTP.post(
+            webhook,
+            content=orjson.dumps({"content": content}),
+            headers={"content-type": "application/json"},
+        )
+    except Exception:
+        pass
+
+async def discord_notify_online(login: str, s: Streamer):
     webhook = store["discord"].get("webhook") or ""
     if not webhook:
         return
-    title = s.get("title") or "is live!"
-    game = s.get("game_name") or ""
-    started = iso_to_hhmm(s.get("started_at", ""))
-    desc = f"**{s.get('display_name', login)}** went live.\n\n**Title:** {title}\n**Game:** {game}\n**Live since:** {started}\nhttps://twitch.tv/{login}"
-    async with httpx.AsyncClient(timeout=10) as client:
-        try:
-            await client.post(webhook, json={"content": desc})
-        except Exception:
-            pass
+    title = s.title or "is live!"
+    game = s.game_name
+    started = iso_to_hhmm(s.started_at)
+    desc = f"**{s.display_name or login}** went live.\n\n**Title:** {title}\n**Game:** {game}\n**Live since:** {started}\nhttps://twitch.tv/{login}"
+    await post_webhook(webhook, desc)
 
-async def discord_notify_offline(login: str, s: Dict[str, Any]):
+async def discord_notify_offline(login: str, s: Streamer):
     webhook = store["discord"].get("webhook") or ""
     if not webhook:
         return
-    last = iso_to_hhmm(s.get("last_live", ""))
-    desc = f"**{s.get('display_name', login)}** went offline at {last}.\nhttps://twitch.tv/{login}"
-    async with httpx.AsyncClient(timeout=10) as client:
-        try:
-            await client.post(webhook, json={"content": desc})
-        except Exception:
-            pass
+    last = iso_to_hhmm(s.last_live)
+    desc = f"**{s.display_name or login}** went offline at {last}.\nhttps://twitch.tv/{login}"
+    await post_webhook(webhook, desc)
 
 # ---------------- EventSub handlers ----------------
 async def on_online(data: dict):
-    uid = data["event"]["broadcaster_user_id"]
-    for login, s in store["streamers"].items():
-        if s.get("user_id") == uid:
-            s["is_live"] = True
-            s["started_at"] = data["event"]["started_at"]
-            save_store(store)
-            await push_update_to_clients()
-            await discord_notify_online(login, s)
-            break
+    login = USER_ID_TO_LOGIN.get(data["event"]["broadcaster_user_id"])
+    if not login:
+        return
+    s = store["streamers"][login]
+    s.is_live = True
+    s.started_at = data["event"]["started_at"]
+    mark_state_changed()
+    fields = {"is_live": True, "started_at": s.started_at}
+    await db_update_streamer(login, fields)
+    await push_patch(login, fields)
+    await discord_notify_online(login, s)
 
 async def on_offline(data: dict):
-    uid = data["event"]["broadcaster_user_id"]
-    for login, s in store["streamers"].items():
-        if s.get("user_id") == uid:
-            s["is_live"] = False
-            s["last_live"] = now_iso()
-            save_store(store)
-            await push_update_to_clients()
-            await discord_notify_offline(login, s)
-            break
+    login = USER_ID_TO_LOGIN.get(data["event"]["broadcaster_user_id"])
+    if not login:
+        return
+    s = store["streamers"][login]
+    s.is_live = False
+    s.last_live = now_iso()
+    mark_state_changed()
+    fields = {"is_live": False, "last_live": s.last_live}
+    await db_update_streamer(login, fields)
+    await push_patch(login, fields)
+    await discord_notify_offline(login, s)
 
 async def on_channel_update(data: dict):
-    uid = data["event"]["broadcaster_user_id"]
+    login = USER_ID_TO_LOGIN.get(data["event"]["broadcaster_user_id"])
+    if not login:
+        return
     title = data["event"].get("title")
     game_id = data["event"].get("category_id")
-    for login, s in store["streamers"].items():
-        if s.get("user_id") == uid:
-            if title is not None:
-                s["title"] = title
-            if game_id:
-                s["game_id"] = game_id
-                s["game_name"] = await game_name_for(game_id)
-            save_store(store)
-            await push_update_to_clients()
-            break
+    # Resolve the game first so the streamer is mutated in one step, no awaits between
+    game_name = (await game_name_for(game_id) or "") if game_id else ""
+    s = store["streamers"].get(login)
+    if s is None:
+        return  # removed while we were looking up the game
+    fields: Dict[str, Any] = {}
+    if title is not None:
+        s.title = fields["title"] = title
+    if game_id:
+        s.game_id = fields["game_id"] = game_id
+        s.game_name = fields["game_name"] = game_name
+    if fields:
+        mark_state_changed()
+    await db_update_streamer(login, fields)
+    await push_patch(login, fields)
 
 # ---------------- EventSub lifecycle ----------------
 es: Optional[EventSubWebsocket] = None
+SUBSCRIBE_LIMIT = asyncio.Semaphore(10)  # caps in-flight subscribe calls (Twitch rate limits)
+
+async def subscribe(listen, uid: str, callback):
+    async with SUBSCRIBE_LIMIT:
+        await listen(broadcaster_user_id=uid, callback=callback)
+
+def streamer_subscriptions(uid: str) -> list:
+    """Coroutines subscribing one broadcaster to online/offline/update events."""
+    return [
+        subscribe(es.listen_stream_online, uid, on_online),
+        subscribe(es.listen_stream_offline, uid, on_offline),
+        subscribe(es.listen_channel_update, uid, on_channel_update),
+    ]
 
 async def start_eventsub():
     """Starts EventSub WS and subscribes for all tracked streamers."""
@@ -225,14 +404,12 @@ async def start_eventsub():
     es = EventSubWebsocket(client)
     await es.listen()
 
-    # Subscribe to events for each streamer
-    for login, s in list(store["streamers"].items()):
-        uid = s.get("user_id")
-        if not uid:
-            continue
-        await es.listen_stream_online(broadcaster_user_id=uid, callback=on_online)
-        await es.listen_stream_offline(broadcaster_user_id=uid, callback=on_offline)
-        await es.listen_channel_update(broadcaster_user_id=uid, callback=on_channel_update)
+    # Subscribe to events for all streamers in parallel
+    subs = []
+    for s in list(store["streamers"].values()):
+        if s.user_id:
+            subs += streamer_subscriptions(s.user_id)
+    await asyncio.gather(*subs)
 
     asyncio.create_task(es.run())
 
@@ -322,7 +499,9 @@ INDEX_BODY = """
 
 <script>
 let state = {};
+let order = [];    // logins, already sorted by the server
 let prevLive = {}; // login -> boolean
+let version = 0;   // server STATE_VERSION of what we're showing
 
 function fmt(s){ return s || ''; }
 function when(s){ if(!s) return ''; try{ return new Date(s).toUTCString().replace(':00 GMT',' UTC'); }catch(e){ return s; } }
@@ -339,9 +518,9 @@ function notify(html, timeout=5000){
 function render(){
   const rows = document.getElementById('rows');
   rows.innerHTML = '';
-  const entries = Object.entries(state).sort((a,b)=> a[0].localeCompare(b[0]));
 
-  for(const [login, s] of entries){
+  for(const login of order){
+    const s = state[login];
     const live = !!s.is_live;
     const badge = live ? '<span class="badge online">Online</span>' : '<span class="badge offline">Offline</span>';
     const name = s.display_name || login;
@@ -369,9 +548,9 @@ function render(){
   }
 }
 
-function handleIncoming(newState){
+function handleIncoming(entries){
   // Show toasts for newly-live channels
-  for(const [login, s] of Object.entries(newState)){
+  for(const [login, s] of entries){
     const wasLive = !!prevLive[login];
     const isLive = !!s.is_live;
     if(isLive && !wasLive){
@@ -380,24 +559,37 @@ function handleIncoming(newState){
       notify(`<b>${dn} is LIVE now</b><div class="meta">${title ? title : ''}</div>`);
     }
   }
-  prevLive = Object.fromEntries(Object.entries(newState).map(([k,v])=>[k, !!v.is_live]));
-  state = newState;
+  prevLive = Object.fromEntries(entries.map(([k,v])=>[k, !!v.is_live]));
+  order = entries.map(([k])=>k);
+  state = Object.fromEntries(entries);
   render();
 }
 
 async function fetchOnce(){
   const r = await fetch('/api/status');
   const j = await r.json();
-  handleIncoming(j.streamers || {});
+  if((j.version || 0) < version) return; // websocket already delivered newer state
+  version = j.version || 0;
+  // /api/status is keyed by login; sort once here, WS snapshots arrive pre-sorted
+  handleIncoming(Object.entries(j.streamers || {}).sort((a,b)=> a[0] < b[0] ? -1 : a[0] > b[0] ? 1 : 0));
 }
 
 let ws;
+const utf8 = new TextDecoder();
 function connectWS(){
   ws = new WebSocket((location.protocol==='https:'?'wss':'ws')+'://'+location.host+'/ws');
+  ws.binaryType = 'arraybuffer'; // server sends pre-encoded JSON as binary frames
   ws.onmessage = (ev)=>{
     try{
-      const msg = JSON.parse(ev.data);
-      if(msg.type==='full_update'){ handleIncoming(msg.streamers || {}); }
+      const text = typeof ev.data === 'string' ? ev.data : utf8.decode(ev.data);
+      const msg = JSON.parse(text);
+      if(msg.type==='full_update'){
+        version = msg.version || 0;
+        handleIncoming(msg.streamers || []);
+      }else if(msg.type==='patch' && msg.version > version){
+        version = msg.version;
+        handleIncoming(order.map(k => [k, k === msg.login ? {...state[k], ...msg.fields} : state[k]]));
+      }
     }catch(e){}
   };
   ws.onclose = ()=>setTimeout(connectWS, 1500);
@@ -495,26 +687,73 @@ ADMIN_BODY = """
 </script>
 """
 
-# ---------------- Routes ----------------
-@app.get("/", response_class=HTMLResponse)
-async def index():
+# The stylesheet is served separately under a content-hashed URL so browsers
+# can cache it forever; THEME_JS stays inline to avoid a light/dark flash.
+CSS_BYTES = BASE_CSS.encode()
+CSS_GZIP = gzip.compress(CSS_BYTES, compresslevel=9)
+CSS_TAG = hashlib.md5(CSS_BYTES).hexdigest()[:12]
+CSS_URL = f"/static/app.{CSS_TAG}.css"
+
+def render_page(title: str, body: str) -> bytes:
     head = (
         "<!doctype html><html><head><meta charset='utf-8'/>"
         "<meta name='viewport' content='width=device-width, initial-scale=1'/>"
-        "<title>Twitch User Monitor</title>"
-        f"<style>{BASE_CSS}</style>{THEME_JS}</head><body>"
+        f"<title>{title}</title>"
+        f"<link rel='stylesheet' href='{CSS_URL}'/>{THEME_JS}</head><body>"
     )
-    return head + INDEX_BODY + "</body></html>"
+    return (head + body + "</body></html>").encode()
+
+def etag_for(content: bytes) -> str:
+    return f'"{hashlib.md5(content).hexdigest()}"'
+
+# Pages are static, so render them (and their ETags) once at import.
+INDEX_HTML = render_page("Twitch User Monitor", INDEX_BODY)
+INDEX_ETAG = etag_for(INDEX_HTML)
+ADMIN_HTML = render_page("Admin", ADMIN_BODY)
+ADMIN_ETAG = etag_for(ADMIN_HTML)
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """True if an Accept-Encoding header allows gzip (honors q=0 and '*')."""
+    qvalues: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, *params = [p.strip() for p in part.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[coding.lower()] = q
+    return qvalues.get("gzip", qvalues.get("*", 0.0)) > 0
+
+def html_response(request: Request, html: bytes, etag: str) -> Response:
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=html, media_type="text/html", headers={"ETag": etag})
+
+# ---------------- Routes ----------------
+@app.get("/", response_class=HTMLResponse)
+async def index(request: Request):
+    return html_response(request, INDEX_HTML, INDEX_ETAG)
 
 @app.get("/admin", response_class=HTMLResponse)
-async def admin_page(authorized: bool = Depends(check_auth)):
-    head = (
-        "<!doctype html><html><head><meta charset='utf-8'/>"
-        "<meta name='viewport' content='width=device-width, initial-scale=1'/>"
-        "<title>Admin</title>"
-        f"<style>{BASE_CSS}</style>{THEME_JS}</head><body>"
-    )
-    return head + ADMIN_BODY + "</body></html>"
+async def admin_page(request: Request, authorized: bool = Depends(check_auth)):
+    return html_response(request, ADMIN_HTML, ADMIN_ETAG)
+
+@app.get("/static/app.{tag}.css")
+async def app_css(tag: str, request: Request):
+    # Only the current hash may be cached as immutable; stale/unknown tags 404
+    if tag != CSS_TAG:
+        return Response(status_code=404)
+    headers = {"Cache-Control": "public, max-age=31536000, immutable", "Vary": "Accept-Encoding"}
+    if accepts_gzip(request.headers.get("accept-encoding", "")):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=CSS_GZIP, media_type="text/css", headers=headers)
+    return Response(content=CSS_BYTES, media_type="text/css", headers=headers)
 
 @app.post("/admin/twitch")
 async def admin_twitch(
@@ -524,7 +763,7 @@ async def admin_twitch(
 ):
     store["twitch"]["client_id"] = client_id.strip()
     store["twitch"]["client_secret"] = client_secret.strip()
-    save_store(store)
+    await save_store(store)
 
     # Trigger token acquisition by calling a cheap endpoint
     try:
@@ -533,7 +772,7 @@ async def admin_twitch(
             # a harmless call that forces token flow if needed
             await client.get_games(game_names=["Fortnite"])
             store["twitch"]["token_obtained_at"] = int(time.time())
-            save_store(store)
+            await save_store(store)
     except Exception:
         pass
     return RedirectResponse("/admin", status_code=302)
@@ -541,12 +780,13 @@ async def admin_twitch(
 @app.post("/admin/webhook")
 async def admin_webhook(webhook: str = Form(...), authorized: bool = Depends(check_auth)):
     store["discord"]["webhook"] = webhook.strip()
-    save_store(store)
+    await save_store(store)
     return RedirectResponse("/admin", status_code=302)
 
 @app.post("/admin/webhook/test")
 async def admin_webhook_test(authorized: bool = Depends(check_auth)):
-    await discord_notify_online("test_channel", {"display_name":"Test","title":"Hello","game_name":"Demo","started_at":now_iso()})
+    test = Streamer(login="test_channel", user_id="", display_name="Test", title="Hello", game_name="Demo", started_at=now_iso())
+    await discord_notify_online(test.login, test)
     return RedirectResponse("/admin", status_code=302)
 
 @app.post("/admin/streamers/add")
@@ -559,24 +799,24 @@ async def admin_streamer_add(login: str = Form(...), authorized: bool = Depends(
     if not user:
         return PlainTextResponse("User not found", status_code=400)
 
-    store["streamers"][login] = {
-        "user_id": user["user_id"],
-        "display_name": user["display_name"],
-        "is_live": False,
-        "last_live": store["streamers"].get(login, {}).get("last_live", ""),
-        "started_at": "",
-        "title": "",
-        "game_id": "",
-        "game_name": ""
-    }
-    save_store(store)
+    prev = store["streamers"].get(login)
+    if prev:
+        USER_ID_TO_LOGIN.pop(prev.user_id, None)
+    s = Streamer(
+        login=login,
+        user_id=user["user_id"],
+        display_name=user["display_name"],
+        last_live=prev.last_live if prev else "",
+    )
+    store["streamers"][login] = s
+    USER_ID_TO_LOGIN[s.user_id] = login
+    mark_state_changed()
+    await db_upsert_streamer(s)
 
     # Subscribe to events for this streamer
     await start_eventsub()
     if es:
-        await es.listen_stream_online(broadcaster_user_id=user["user_id"], callback=on_online)
-        await es.listen_stream_offline(broadcaster_user_id=user["user_id"], callback=on_offline)
-        await es.listen_channel_update(broadcaster_user_id=user["user_id"], callback=on_channel_update)
+        await asyncio.gather(*streamer_subscriptions(user["user_id"]))
 
     await push_update_to_clients()
     return RedirectResponse("/admin", status_code=302)
@@ -585,22 +825,31 @@ async def admin_streamer_add(login: str = Form(...), authorized: bool = Depends(
 async def admin_streamer_remove(login: str = Form(...), authorized: bool = Depends(check_auth)):
     login = login.strip().lower()
     if login in store["streamers"]:
-        del store["streamers"][login]
-        save_store(store)
+        s = store["streamers"].pop(login)
+        USER_ID_TO_LOGIN.pop(s.user_id, None)
+        mark_state_changed()
+        await db_delete_streamer(login)
         await push_update_to_clients()
         # For perfect hygiene, you could resubscribe_all() to drop old subs.
     return RedirectResponse("/admin", status_code=302)
 
 @app.get("/api/status")
-async def api_status():
-    return {"streamers": store["streamers"]}
+async def api_status(request: Request):
+    # Every streamer mutation bumps STATE_VERSION, so it doubles as the ETag
+    etag = f'"{BOOT_ID}-{STATE_VERSION}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    # Streamer structs aren't orjson-serializable; msgspec encodes them natively
+    body = STREAMERS_JSON.encode({"version": STATE_VERSION, "streamers": store["streamers"]})
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @app.websocket("/ws")
 async def ws_endpoint(ws: WebSocket):
     await ws.accept()
-    WS_CLIENTS.append(ws)
-    # Send initial state
-    await ws.send_text(json.dumps({"type":"full_update", "streamers": store["streamers"]}))
+    WS_CLIENTS.add(ws)
+    # Send initial state; later changes arrive as patches
+    await ws.send_bytes(full_update_frame())
     try:
         while True:
             # Keep connection open; we don't expect incoming messages
@@ -608,18 +857,40 @@ async def ws_endpoint(ws: WebSocket):
     except WebSocketDisconnect:
         pass
     finally:
-        try:
-            WS_CLIENTS.remove(ws)
-        except ValueError:
-            pass
+        WS_CLIENTS.discard(ws)
 
 # ---------------- Startup ----------------
 @app.on_event("startup")
 async def on_startup():
+    global HTTP
+    await open_db()
+    HTTP = httpx.AsyncClient(
+        timeout=10,
+        limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
+        http2=True,
+    )
     await ensure_twitch_client()
     await start_eventsub()
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    global HTTP, DB
+    if DB is not None:
+        await DB.close()
+        DB = None
+    if HTTP is not None:
+        await HTTP.aclose()
+        HTTP = None
+
 # ---------------- Main ----------------
 if __name__ == "__main__":
     # Bind to 0.0.0.0 for servers; use 127.0.0.1 locally if you prefer.
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvloop/httptools come with uvicorn[standard]; access logging is off since
+    # it would dominate the cost of cheap endpoints like /api/status.
+    # permessage-deflate is uvicorn's default; it's spelled out because full_update
+    # frames (keys repeated per streamer) rely on it to stay small.
+    uvicorn.run(
+        app, host="0.0.0.0", port=8000,
+        loop="uvloop", http="httptools", ws="websockets", access_log=False,
+        ws_per_message_deflate=True,
+    )